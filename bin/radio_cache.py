@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""JSON caches of parsed radio YAML configs.
+
+Shared by radio_lib (and the scripts built on it) and web/pi_backend.py, so
+both sides read and write <name>.json next to <name>.yaml the same way. The
+module only needs the standard library (orjson is used when installed).
+
+A cache file is {"source": [st_mtime_ns, st_size], "data": ...}, where
+source is the stat() stamp of the YAML the data was parsed from. It is only
+used while the YAML still has exactly that stamp.
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+# Mappings whose keys are not all strings (e.g. the integer bank/station ids
+# in stations.yaml) are stored as {_JSON_MAP_TAG: [[k, v], ...]} so the
+# original key types survive the round trip.
+_JSON_MAP_TAG = "__yaml_map__"
+
+
+def _to_json_safe(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        if all(type(k) is str for k in obj):
+            return {k: _to_json_safe(v) for k, v in obj.items()}
+        return {_JSON_MAP_TAG: [[k, _to_json_safe(v)] for k, v in obj.items()]}
+    if isinstance(obj, list):
+        return [_to_json_safe(v) for v in obj]
+    return obj
+
+
+def _from_json_safe(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        if len(obj) == 1 and _JSON_MAP_TAG in obj:
+            return {k: _from_json_safe(v) for k, v in obj[_JSON_MAP_TAG]}
+        return {k: _from_json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_from_json_safe(v) for v in obj]
+    return obj
+
+
+def _json_loads(raw: bytes) -> Any:
+    return _orjson.loads(raw) if _orjson is not None else json.loads(raw)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return _orjson.dumps(obj) if _orjson is not None else json.dumps(obj).encode("utf-8")
+
+
+def read_json_cache(path: Path, st: os.stat_result) -> Optional[Any]:
+    """Return data from the .json cache next to path if it is still fresh.
+
+    Args:
+        path: Path of the YAML file
+        st: Result of stat() on the YAML file
+
+    Returns:
+        The cached data, or None if there is no cache for this exact
+        version of the YAML
+    """
+    try:
+        cached = _json_loads(path.with_suffix(".json").read_bytes())
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(cached, dict)
+            or cached.get("source") != [st.st_mtime_ns, st.st_size]
+            or "data" not in cached):
+        return None
+    return _from_json_safe(cached["data"])
+
+
+def write_json_cache(path: Path, data: Any, st: os.stat_result) -> Path:
+    """Atomically write data, parsed from the YAML at path, to its .json cache.
+
+    Args:
+        path: Path of the YAML file
+        data: The parsed YAML
+        st: Result of stat() on the YAML, taken before it was read
+
+    Returns:
+        Path of the written JSON file
+
+    Raises:
+        ValueError: If data holds values JSON cannot represent exactly
+            (dates, sets, non-scalar keys, ...)
+        OSError: If the cache file cannot be written
+    """
+    try:
+        payload = _json_dumps({"source": [st.st_mtime_ns, st.st_size], "data": _to_json_safe(data)})
+    except TypeError as e:
+        raise ValueError(f"{path} cannot be cached as JSON: {e}")
+    if _from_json_safe(_json_loads(payload)["data"]) != data:
+        raise ValueError(f"{path} cannot be cached as JSON without changing its data")
+
+    cache = path.with_suffix(".json")
+    fd, tmp = tempfile.mkstemp(dir=str(cache.parent), prefix=cache.name + ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, cache)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return cache
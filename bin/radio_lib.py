@@ -3,13 +3,97 @@
 
 This module provides common functionality used across encoder-controller,
 oled-display, and radio-play scripts.
+
+YAML is parsed with libyaml's CSafeLoader when PyYAML was built against it
+(Debian's python3-yaml is; pip builds need the libyaml-dev package present).
+Otherwise the pure-Python SafeLoader is used with identical results.
 """
+import atexit
+import copy
 import logging
+import os
 import subprocess
+import threading
 import yaml
 from mpd import MPDClient
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List
+
+import radio_cache
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# path -> ((mtime_ns, size), parsed YAML) so long-running processes only
+# re-parse a config file when it actually changes. One entry per path: a
+# changed file replaces its old entry.
+_YAML_CACHE: Dict[Path, tuple] = {}
+
+# Parsed I2C address strings; configs only ever use a handful of them.
+_I2C_ADDR_CACHE: Dict[str, int] = {}
+
+# Opt-in: RADIO_LOG_BUFFER=1 batches file log writes (BufferedFileHandler)
+# to spare the SD card. Off by default so log files stay current.
+_LOG_BUFFER = os.getenv("RADIO_LOG_BUFFER") == "1"
+
+_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """Append-only file handler that batches writes to spare the SD card.
+
+    Records go through a 64 KiB write buffer. The buffer is flushed right
+    away for WARNING and above, and otherwise at most flush_interval seconds
+    after the first unflushed record (and on close/shutdown).
+    """
+
+    def __init__(self, filename, buffer_size: int = 64 * 1024, flush_interval: float = 5.0,
+                 flush_level: int = logging.WARNING, **kwargs):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self._flush_timer: Optional[threading.Timer] = None
+        super().__init__(filename, mode="a", **kwargs)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.flush_level
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if self.shouldFlush(record):
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _timed_flush(self) -> None:
+        with self.lock:
+            self._flush_timer = None
+        self.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        super().close()
 
 
 def setup_logging(name: str, log_file: Optional[Path] = None) -> logging.Logger:
@@ -32,24 +116,19 @@ def setup_logging(name: str, log_file: Optional[Path] = None) -> logging.Logger:
     # Remove any existing handlers to avoid duplicates
     logger.handlers.clear()
     
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
     # Console handler (captured by systemd journal)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(_FORMATTER)
     logger.addHandler(console_handler)
     
     # Optional file handler for persistent logs
     if log_file:
         try:
             log_file.parent.mkdir(parents=True, exist_ok=True)
-            file_handler = logging.FileHandler(log_file)
+            file_handler = BufferedFileHandler(log_file) if _LOG_BUFFER else logging.FileHandler(log_file)
             file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(formatter)
+            file_handler.setFormatter(_FORMATTER)
             logger.addHandler(file_handler)
         except Exception as e:
             # If file logging fails, just continue with console logging
@@ -78,16 +157,27 @@ def parse_i2c_addr(v: Any) -> int:
         >>> parse_i2c_addr("54")
         54
     """
-    if isinstance(v, int):
+    if type(v) is int:
         return v
     if isinstance(v, str):
-        v = v.strip().lower()
-        return int(v, 16) if v.startswith("0x") else int(v)
+        addr = _I2C_ADDR_CACHE.get(v)
+        if addr is None:
+            s = v.strip().lower()
+            addr = _I2C_ADDR_CACHE[v] = int(s, 16) if s.startswith("0x") else int(s)
+        return addr
+    if isinstance(v, int):
+        return v
     raise TypeError(f"Unsupported I2C address type: {type(v)}")
 
 
 def load_yaml(path: Path) -> Dict[str, Any]:
     """Load YAML file, return empty dict if file doesn't exist.
+
+    Results are cached per (path, mtime, size); callers get a deep copy so
+    they may mutate it freely. Use load_yaml.cache_clear() to drop the cache.
+    If a JSON cache for this exact version of the file (same mtime and
+    size) sits next to it, that is loaded instead of parsing the YAML;
+    otherwise the YAML is parsed and the cache rewritten when possible.
     
     Args:
         path: Path to YAML file
@@ -98,12 +188,52 @@ def load_yaml(path: Path) -> Dict[str, Any]:
     Example:
         cfg = load_yaml(Path("/home/radio/hardware-config.yaml"))
     """
-    if not path.exists():
+    try:
+        st = path.stat()
+    except FileNotFoundError:
         return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _YAML_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return copy.deepcopy(cached[1])
+    data = radio_cache.read_json_cache(path, st)
+    if data is None:
+        try:
+            data = yaml.load(path.read_text(), Loader=_SafeLoader) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {path}: {e}")
+        # Refresh the JSON cache so the next process can skip parsing
+        try:
+            radio_cache.write_json_cache(path, data, st)
+        except (OSError, ValueError):
+            pass
+    _YAML_CACHE[path] = (stamp, data)
+    return copy.deepcopy(data)
+
+
+load_yaml.cache_clear = _YAML_CACHE.clear
+
+
+def write_json_cache(path: Path) -> Path:
+    """Parse a YAML file and write its JSON cache (same name, .json suffix).
+
+    load_yaml() uses the cache only while the YAML keeps the mtime and size
+    recorded in it, so run this again after editing the YAML
+    (bin/radio-cache-configs).
+
+    Returns:
+        Path of the written JSON file
+
+    Raises:
+        ValueError: If the YAML is invalid or holds values JSON cannot
+            represent exactly (dates, sets, non-scalar keys, ...)
+    """
+    st = path.stat()
     try:
-        return yaml.safe_load(path.read_text()) or {}
+        data = yaml.load(path.read_text(), Loader=_SafeLoader) or {}
     except yaml.YAMLError as e:
         raise ValueError(f"Invalid YAML in {path}: {e}")
+    return radio_cache.write_json_cache(path, data, st)
 
 
 def read_state(state_path: Path) -> Dict[str, str]:
@@ -119,45 +249,144 @@ def read_state(state_path: Path) -> Dict[str, str]:
         state = read_state(Path("/home/radio/.radio-state"))
         bank = int(state.get("current_bank", "0"))
     """
+    try:
+        text = state_path.read_text()
+    except FileNotFoundError:
+        return {}
     st = {}
-    if not state_path.exists():
-        return st
-    
-    for line in state_path.read_text().splitlines():
+    for line in text.splitlines():
         line = line.strip()
-        if line and "=" in line and not line.startswith("#"):
-            k, v = line.split("=", 1)
+        if line and "=" in line and line[0] != "#":
+            k, _, v = line.partition("=")
             st[k.strip()] = v.strip()
     return st
 
 
-def write_state(state_path: Path, **kwargs) -> None:
+class StateWriter:
+    """Coalesce state file updates and write them at most once per interval.
+
+    Updates are merged in memory; a timer writes the accumulated keys in
+    one go after flush_interval seconds. Pending updates are also written
+    at interpreter exit, or when flush_state() is called.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = 0.25):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def update(self, **kwargs) -> None:
+        """Queue key/value updates, scheduling a flush if none is pending."""
+        with self._lock:
+            self._pending.update({k: str(v) for k, v in kwargs.items()})
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self, sync: bool = False) -> None:
+        """Write any pending updates to disk now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+            if pending:
+                _write_state_now(self.path, pending, sync=sync)
+
+
+# Last contents written per state file, tagged with the (inode, mtime_ns)
+# of the file we produced, so writes skip re-reading an unchanged file.
+_STATE_CACHE: Dict[Path, tuple] = {}
+
+_STATE_WRITERS: Dict[Path, StateWriter] = {}
+_STATE_WRITERS_LOCK = threading.Lock()
+
+
+def flush_state() -> None:
+    """Write all pending state updates to disk now.
+
+    Pending updates are written automatically at normal interpreter exit.
+    Long-running scripts that stop on a signal should call this from their
+    own shutdown path, since a fatal signal skips atexit handlers.
+    """
+    for writer in list(_STATE_WRITERS.values()):
+        writer.flush()
+
+
+def _get_state_writer(state_path: Path) -> StateWriter:
+    with _STATE_WRITERS_LOCK:
+        writer = _STATE_WRITERS.get(state_path)
+        if writer is None:
+            if not _STATE_WRITERS:
+                atexit.register(flush_state)
+            writer = _STATE_WRITERS[state_path] = StateWriter(state_path)
+        return writer
+
+
+def write_state(state_path: Path, *, sync: bool = False, **kwargs) -> None:
     """Write state file, preserving existing keys not in kwargs.
+
+    Updates are coalesced by a per-path StateWriter and reach the disk
+    within a quarter second (or at exit). Pass sync=True to write and
+    fsync immediately.
     
     Args:
         state_path: Path to state file
+        sync: If True, flush now and fsync before returning
         **kwargs: Key-value pairs to write/update
         
     Example:
         write_state(STATE_PATH, current_bank=0, current_station=3, last_volume=75)
     """
-    # Read existing state to preserve keys we're not updating
-    st = read_state(state_path)
+    writer = _get_state_writer(state_path)
+    writer.update(**kwargs)
+    if sync:
+        writer.flush(sync=True)
+
+
+def _write_state_now(state_path: Path, updates: Dict[str, str], sync: bool = False) -> None:
+    """Merge updates into the state file with a single write and atomic rename."""
+    # Reuse the last state we wrote unless another process replaced the file
+    try:
+        fst = os.stat(state_path)
+        version = (fst.st_ino, fst.st_mtime_ns)
+    except FileNotFoundError:
+        version = None
+    cached = _STATE_CACHE.get(state_path)
+    if cached is not None and version is not None and cached[0] == version:
+        st = dict(cached[1])
+    else:
+        st = read_state(state_path)
     
     # Update with new values
-    st.update({k: str(v) for k, v in kwargs.items()})
+    st.update(updates)
     
     # Write back
     out = "".join(f"{k}={v}\n" for k, v in st.items())
-    state_path.write_text(out)
+    tmp = f"{state_path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, out.encode())
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, state_path)
+    fst = os.stat(state_path)
+    _STATE_CACHE[state_path] = ((fst.st_ino, fst.st_mtime_ns), st)
 
 
-def sh(cmd, check=False) -> subprocess.CompletedProcess:
+def sh(cmd, check=False, capture=True) -> subprocess.CompletedProcess:
     """Run shell command and return result.
     
     Args:
         cmd: Command as list of strings
         check: If True, raise CalledProcessError on non-zero exit
+        capture: If False, discard output via /dev/null instead of pipes
+            (stdout/stderr on the result are then None)
         
     Returns:
         CompletedProcess with stdout, stderr, and returncode
@@ -167,11 +396,12 @@ def sh(cmd, check=False) -> subprocess.CompletedProcess:
         if result.returncode == 0:
             print(result.stdout)
     """
+    out = subprocess.PIPE if capture else subprocess.DEVNULL
     return subprocess.run(
         cmd, 
-        stdout=subprocess.PIPE, 
-        stderr=subprocess.PIPE, 
-        text=True, 
+        stdout=out, 
+        stderr=out, 
+        text=capture, 
         check=check
     )
 
@@ -198,9 +428,34 @@ def clamp(n: float, lo: float, hi: float) -> float:
     return lo if n < lo else hi if n > hi else n
 
 
+def make_clamp(lo: float, hi: float) -> Callable[[float], float]:
+    """Return a clamp function specialized to a fixed [lo, hi] range.
+
+    Useful in polling loops where the bounds never change.
+
+    Examples:
+        >>> vol_clamp = make_clamp(0, 100)
+        >>> vol_clamp(120)
+        100
+    """
+    def _clamp(n: float) -> float:
+        return lo if n < lo else hi if n > hi else n
+    return _clamp
+
+
+# Validation results keyed by (id(cfg), variant, top-level keys). The cfg
+# object itself is kept in the entry so its id cannot be reused while cached.
+_VALIDATION_CACHE: Dict[tuple, tuple] = {}
+_VALIDATION_CACHE_MAX = 32
+
+
 def validate_hardware_config(cfg: Dict[str, Any], variant: str = "encoder_oled") -> list:
     """Validate hardware configuration for a specific hardware variant.
 
+    Results are memoized per config object, so re-validating an unmodified
+    config is a dict lookup. Call validate_hardware_config.cache_clear()
+    after mutating a config in place.
+
     Args:
         cfg: Hardware config dictionary
         variant: Hardware variant ("encoder_oled" or "rotary")
@@ -208,165 +463,209 @@ def validate_hardware_config(cfg: Dict[str, Any], variant: str = "encoder_oled")
     Returns:
         List of error messages (empty if valid)
     """
-    if variant == "encoder_oled":
-        return _validate_encoder_oled_config(cfg)
-    if variant == "rotary":
-        return _validate_rotary_config(cfg)
-    return [f"Unknown hardware variant: {variant}"]
+    if not isinstance(cfg, dict):
+        return _validate_hardware_config(cfg, variant)
 
+    key = (id(cfg), variant, frozenset(cfg))
+    entry = _VALIDATION_CACHE.get(key)
+    if entry is not None and entry[0] is cfg:
+        return list(entry[1])
 
-def _validate_encoder_oled_config(cfg: Dict[str, Any]) -> List[str]:
-    """Validate legacy encoder + OLED configuration."""
-    errors: List[str] = []
+    errors = _validate_hardware_config(cfg, variant)
+    if len(_VALIDATION_CACHE) >= _VALIDATION_CACHE_MAX:
+        _VALIDATION_CACHE.clear()
+    _VALIDATION_CACHE[key] = (cfg, tuple(errors))
+    return errors
 
-    if not isinstance(cfg, dict):
-        return ["Hardware config must be a dictionary"]
 
-    if "i2c" not in cfg:
-        errors.append("Missing 'i2c' section")
-    else:
-        i2c = cfg["i2c"]
-        if "encoder_i2c_address" not in i2c:
-            errors.append("Missing i2c.encoder_i2c_address")
-        if "oled_i2c_address" not in i2c:
-            errors.append("Missing i2c.oled_i2c_address")
+validate_hardware_config.cache_clear = _VALIDATION_CACHE.clear
 
-    if "encoders" not in cfg:
-        errors.append("Missing 'encoders' section")
 
-    if "controls" not in cfg:
-        errors.append("Missing 'controls' section")
-    else:
-        ctl = cfg["controls"]
-        required = ["bank_min", "bank_max", "station_min", "station_max",
-                    "volume_min", "volume_max", "volume_step"]
-        for key in required:
-            if key not in ctl:
-                errors.append(f"Missing controls.{key}")
+def _validate_hardware_config(cfg: Dict[str, Any], variant: str) -> List[str]:
+    if variant == "encoder_oled":
+        return _validate_encoder_oled_config(cfg)
+    if variant == "rotary":
+        return _validate_rotary_config(cfg)
+    return [f"Unknown hardware variant: {variant}"]
 
-    if "buttons" not in cfg:
-        errors.append("Missing 'buttons' section")
 
-    if "display" not in cfg:
-        errors.append("Missing 'display' section")
+# Encoder + OLED variant: (section, required keys within that section).
+# Keys every variant requires under "controls", in error-reporting order.
+_CONTROL_KEYS = ("bank_min", "bank_max", "station_min", "station_max",
+                 "volume_min", "volume_max", "volume_step")
 
-    return errors
+_HW_SCHEMA_ENCODER_OLED = (
+    ("i2c", ("encoder_i2c_address", "oled_i2c_address")),
+    ("encoders", ()),
+    ("controls", _CONTROL_KEYS),
+    ("buttons", ()),
+    ("display", ()),
+)
 
 
-def _validate_rotary_config(cfg: Dict[str, Any]) -> List[str]:
-    """Validate rotary-switch variant configuration."""
-    errors: List[str] = []
+def _compile_presence_schema(schema) -> Callable[[Dict[str, Any]], List[str]]:
+    """Build a validator for a (section, required_keys) schema.
 
-    if not isinstance(cfg, dict):
-        return ["Hardware config must be a dictionary"]
+    All error strings are formatted once here. Each section's keys are
+    checked with a single set difference; the ordered per-key messages are
+    only walked when something is actually missing.
+    """
+    compiled = tuple(
+        (section, f"Missing '{section}' section", frozenset(keys),
+         tuple((key, f"Missing {section}.{key}") for key in keys))
+        for section, keys in schema
+    )
 
-    i2c = cfg.get("i2c")
-    if not isinstance(i2c, dict):
-        errors.append("Missing or invalid 'i2c' section (must be a mapping)")
-    else:
-        addr = i2c.get("volume_i2c_address")
-        if addr is None:
-            errors.append("Missing i2c.volume_i2c_address")
-        else:
-            try:
-                parse_i2c_addr(addr)
-            except Exception as err:
-                errors.append(f"Invalid i2c.volume_i2c_address ({addr!r}): {err}")
-
-    switches = cfg.get("switches")
-    if not isinstance(switches, dict):
-        errors.append("Missing or invalid 'switches' section (must be a mapping)")
-    else:
-        for sw_name in ("station_switch", "bank_switch"):
-            sw = switches.get(sw_name)
-            if not isinstance(sw, dict):
-                errors.append(f"Missing or invalid switches.{sw_name} (must be a mapping)")
+    def validate(cfg: Dict[str, Any]) -> List[str]:
+        errors: List[str] = []
+        for section, missing_section, required, keys in compiled:
+            if section not in cfg:
+                errors.append(missing_section)
                 continue
-            for bit in ("bit0", "bit1", "bit2", "bit3"):
-                pin = sw.get(bit)
-                if not isinstance(pin, int):
-                    errors.append(f"switches.{sw_name}.{bit} must be an integer GPIO pin")
-
-        for map_name in ("bank_decode_map", "station_decode_map"):
-            decode_map = switches.get(map_name)
-            if decode_map is None:
+            if not required:
                 continue
-            if not isinstance(decode_map, dict):
-                errors.append(f"switches.{map_name} must be a mapping of raw_code->decoded_digit")
-                continue
-            for raw_code, decoded in decode_map.items():
-                if not isinstance(raw_code, int):
-                    errors.append(f"switches.{map_name} key {raw_code!r} must be an integer")
-                elif raw_code < 0 or raw_code > 15:
-                    errors.append(f"switches.{map_name} key {raw_code!r} must be in range 0-15")
-
-                if not isinstance(decoded, int):
-                    errors.append(f"switches.{map_name}[{raw_code!r}] must be an integer")
-                elif decoded < 0 or decoded > 9:
-                    errors.append(f"switches.{map_name}[{raw_code!r}] must be in range 0-9")
-
-    encoders = cfg.get("encoders")
-    if not isinstance(encoders, dict):
-        errors.append("Missing or invalid 'encoders' section (must be a mapping)")
-    elif not isinstance(encoders.get("volume_encoder"), int):
-        errors.append("encoders.volume_encoder must be an integer")
-
-    controls = cfg.get("controls")
-    if not isinstance(controls, dict):
-        errors.append("Missing or invalid 'controls' section (must be a mapping)")
-    else:
-        required_ints = ["bank_min", "bank_max", "station_min", "station_max", "volume_min", "volume_max", "volume_step"]
-        for key in required_ints:
-            if not isinstance(controls.get(key), int):
-                errors.append(f"controls.{key} must be an integer")
+            sub = cfg[section]
+            missing = required - sub.keys() if isinstance(sub, dict) else required
+            if missing:
+                errors.extend(msg for key, msg in keys if key in missing)
+        return errors
 
-        if all(isinstance(controls.get(k), int) for k in ("bank_min", "bank_max")):
-            if controls["bank_min"] > controls["bank_max"]:
-                errors.append("controls.bank_min must be <= controls.bank_max")
+    return validate
 
-        if all(isinstance(controls.get(k), int) for k in ("station_min", "station_max")):
-            if controls["station_min"] > controls["station_max"]:
-                errors.append("controls.station_min must be <= controls.station_max")
 
-        if all(isinstance(controls.get(k), int) for k in ("volume_min", "volume_max")):
-            if controls["volume_min"] > controls["volume_max"]:
-                errors.append("controls.volume_min must be <= controls.volume_max")
+_ENC_VALIDATOR = _compile_presence_schema(_HW_SCHEMA_ENCODER_OLED)
 
-        if isinstance(controls.get("volume_step"), int) and controls["volume_step"] <= 0:
-            errors.append("controls.volume_step must be > 0")
 
-    buttons = cfg.get("buttons")
-    if not isinstance(buttons, dict):
-        errors.append("Missing or invalid 'buttons' section (must be a mapping)")
-    else:
-        action = buttons.get("volume_button")
-        allowed_actions = {"play_pause", "mute_toggle", "noop"}
-        if not isinstance(action, str) or action not in allowed_actions:
-            errors.append(
-                "buttons.volume_button must be one of: play_pause, mute_toggle, noop"
-            )
-
-    polling = cfg.get("polling")
-    if not isinstance(polling, dict):
-        errors.append("Missing or invalid 'polling' section (must be a mapping)")
-    else:
-        poll_interval = polling.get("switch_poll_interval")
-        debounce = polling.get("switch_debounce")
-        stability_window = polling.get("switch_stability_window", 0.12)
-        invalid_log_interval = polling.get("invalid_code_log_interval", 5.0)
+def _validate_encoder_oled_config(cfg: Dict[str, Any]) -> List[str]:
+    """Validate legacy encoder + OLED configuration."""
+    if not isinstance(cfg, dict):
+        return ["Hardware config must be a dictionary"]
+    return _ENC_VALIDATOR(cfg)
 
-        if not isinstance(poll_interval, (int, float)) or poll_interval <= 0:
-            errors.append("polling.switch_poll_interval must be a number > 0")
 
-        if not isinstance(debounce, (int, float)) or debounce < 0:
-            errors.append("polling.switch_debounce must be a number >= 0")
+def _rule_i2c_addr(sec: str, data: Dict[str, Any], key: str, errors: List[str]) -> None:
+    addr = data.get(key)
+    if addr is None:
+        errors.append(f"Missing {sec}.{key}")
+        return
+    try:
+        parse_i2c_addr(addr)
+    except Exception as err:
+        errors.append(f"Invalid {sec}.{key} ({addr!r}): {err}")
+
+
+def _rule_gpio_bits(sec: str, data: Dict[str, Any], key: str, errors: List[str]) -> None:
+    sw = data.get(key)
+    if not isinstance(sw, dict):
+        errors.append(f"Missing or invalid {sec}.{key} (must be a mapping)")
+        return
+    for bit in ("bit0", "bit1", "bit2", "bit3"):
+        if not isinstance(sw.get(bit), int):
+            errors.append(f"{sec}.{key}.{bit} must be an integer GPIO pin")
+
+
+def _rule_decode_map(sec: str, data: Dict[str, Any], key: str, errors: List[str]) -> None:
+    decode_map = data.get(key)
+    if decode_map is None:
+        return
+    if not isinstance(decode_map, dict):
+        errors.append(f"{sec}.{key} must be a mapping of raw_code->decoded_digit")
+        return
+    for raw_code, decoded in decode_map.items():
+        if not isinstance(raw_code, int):
+            errors.append(f"{sec}.{key} key {raw_code!r} must be an integer")
+        elif raw_code < 0 or raw_code > 15:
+            errors.append(f"{sec}.{key} key {raw_code!r} must be in range 0-15")
+
+        if not isinstance(decoded, int):
+            errors.append(f"{sec}.{key}[{raw_code!r}] must be an integer")
+        elif decoded < 0 or decoded > 9:
+            errors.append(f"{sec}.{key}[{raw_code!r}] must be in range 0-9")
+
+
+def _rule_int(sec: str, data: Dict[str, Any], key: str, errors: List[str]) -> None:
+    if not isinstance(data.get(key), int):
+        errors.append(f"{sec}.{key} must be an integer")
+
+
+def _rule_ordered(sec: str, data: Dict[str, Any], key: str, errors: List[str], hi: str) -> None:
+    lo_v, hi_v = data.get(key), data.get(hi)
+    if isinstance(lo_v, int) and isinstance(hi_v, int) and lo_v > hi_v:
+        errors.append(f"{sec}.{key} must be <= {sec}.{hi}")
+
+
+def _rule_positive(sec: str, data: Dict[str, Any], key: str, errors: List[str]) -> None:
+    value = data.get(key)
+    if isinstance(value, int) and value <= 0:
+        errors.append(f"{sec}.{key} must be > 0")
+
+
+def _rule_choice(sec: str, data: Dict[str, Any], key: str, errors: List[str], choices: tuple) -> None:
+    value = data.get(key)
+    if not isinstance(value, str) or value not in choices:
+        errors.append(f"{sec}.{key} must be one of: {', '.join(choices)}")
+
+
+def _rule_number(
+    sec: str, data: Dict[str, Any], key: str, errors: List[str], default: Any, allow_zero: bool
+) -> None:
+    value = data.get(key, default)
+    if not isinstance(value, (int, float)) or value < 0 or (value == 0 and not allow_zero):
+        errors.append(f"{sec}.{key} must be a number {'>=' if allow_zero else '>'} 0")
+
+
+# Rotary variant: (section, [(rule, key, *extra rule args), ...]). Every
+# section must be a mapping; rules run in order and append error strings.
+_ROTARY_SCHEMA = (
+    ("i2c", (
+        (_rule_i2c_addr, "volume_i2c_address"),
+    )),
+    ("switches", (
+        (_rule_gpio_bits, "station_switch"),
+        (_rule_gpio_bits, "bank_switch"),
+        (_rule_decode_map, "bank_decode_map"),
+        (_rule_decode_map, "station_decode_map"),
+    )),
+    ("encoders", (
+        (_rule_int, "volume_encoder"),
+    )),
+    ("controls", (
+        *((_rule_int, key) for key in _CONTROL_KEYS),
+        (_rule_ordered, "bank_min", "bank_max"),
+        (_rule_ordered, "station_min", "station_max"),
+        (_rule_ordered, "volume_min", "volume_max"),
+        (_rule_positive, "volume_step"),
+    )),
+    ("buttons", (
+        (_rule_choice, "volume_button", ("play_pause", "mute_toggle", "noop")),
+    )),
+    ("polling", (
+        (_rule_number, "switch_poll_interval", None, False),
+        (_rule_number, "switch_debounce", None, True),
+        (_rule_number, "switch_stability_window", 0.12, True),
+        (_rule_number, "invalid_code_log_interval", 5.0, True),
+    )),
+)
+
+
+def _check(cfg: Dict[str, Any], schema, errors: List[str]) -> None:
+    """Walk a (section, rules) schema table, appending errors."""
+    for section, rules in schema:
+        data = cfg.get(section)
+        if not isinstance(data, dict):
+            errors.append(f"Missing or invalid '{section}' section (must be a mapping)")
+            continue
+        for rule, key, *args in rules:
+            rule(section, data, key, errors, *args)
 
-        if not isinstance(stability_window, (int, float)) or stability_window < 0:
-            errors.append("polling.switch_stability_window must be a number >= 0")
 
-        if not isinstance(invalid_log_interval, (int, float)) or invalid_log_interval < 0:
-            errors.append("polling.invalid_code_log_interval must be a number >= 0")
+def _validate_rotary_config(cfg: Dict[str, Any]) -> List[str]:
+    """Validate rotary-switch variant configuration."""
+    if not isinstance(cfg, dict):
+        return ["Hardware config must be a dictionary"]
 
+    errors: List[str] = []
+    _check(cfg, _ROTARY_SCHEMA, errors)
     return errors
 
 def validate_stations_config(cfg: Dict[str, Any]) -> list:
@@ -408,7 +707,9 @@ def validate_stations_config(cfg: Dict[str, Any]) -> list:
     return errors
 
 
-def wait_for_mpd(max_retries: int = 10, delay: float = 1.0, logger: Optional[logging.Logger] = None) -> bool:
+def wait_for_mpd(
+    max_retries: int = 10, delay: float = 1.0, logger: Optional[logging.Logger] = None
+) -> Optional[MPDClient]:
     """Wait for MPD to become ready.
     
     Args:
@@ -417,35 +718,41 @@ def wait_for_mpd(max_retries: int = 10, delay: float = 1.0, logger: Optional[log
         logger: Optional logger for status messages
         
     Returns:
-        True if MPD is ready, False if all retries exhausted
+        The connected MPDClient once MPD answers (the caller owns it and
+        should reuse or disconnect it), or None if all retries are exhausted
         
     Example:
-        if not wait_for_mpd(logger=logger):
+        client = wait_for_mpd(logger=logger)
+        if client is None:
             logger.error("MPD failed to start")
             sys.exit(1)
     """
     import time
 
+    client = MPDClient()
+    client.timeout = 5
+    client.idletimeout = None
+    connected = False
     for attempt in range(max_retries):
-        client = MPDClient()
-        client.timeout = 5
-        client.idletimeout = None
         try:
-            client.connect("localhost", 6600)
-            client.status()
+            if not connected:
+                client.connect("localhost", 6600)
+                connected = True
+            client.ping()
             if logger:
                 logger.info(f"MPD ready (attempt {attempt + 1}/{max_retries})")
-            return True
+            return client
         except Exception:
+            if connected:
+                try:
+                    client.disconnect()
+                except Exception:
+                    pass
+                connected = False
             if logger:
                 logger.warning(f"MPD not ready, retry {attempt + 1}/{max_retries}")
             time.sleep(delay)
-        finally:
-            try:
-                client.disconnect()
-            except Exception:
-                pass
 
     if logger:
         logger.error("MPD failed to start after all retries")
-    return False
+    return None
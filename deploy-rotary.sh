@@ -36,10 +36,12 @@ git pull origin main
 # 2. Update scripts
 echo "→ Updating scripts..."
 copy_file_safe bin/radio_lib.py /usr/local/bin/
+copy_file_safe bin/radio_cache.py /usr/local/bin/
 copy_file_safe bin/rotary-controller /usr/local/bin/
 copy_file_safe bin/radio-play /usr/local/bin/
 copy_file_safe bin/update-stations /usr/local/bin/
-sudo chmod +x /usr/local/bin/{rotary-controller,radio-play,update-stations}
+copy_file_safe bin/radio-cache-configs /usr/local/bin/
+sudo chmod +x /usr/local/bin/{rotary-controller,radio-play,update-stations,radio-cache-configs}
 
 sudo mkdir -p /usr/local/lib/radio
 copy_file_safe bin/setup-ap-manager /usr/local/lib/radio/setup-ap-manager
@@ -54,6 +56,8 @@ echo "→ Updating configs..."
 copy_file_safe config/hardware-rotary.yaml /home/radio/
 copy_file_safe config/stations.yaml /home/radio/
 sudo chown radio:radio /home/radio/*.yaml
+# Pre-parse configs to JSON so scripts skip YAML parsing at startup
+sudo -u radio /usr/bin/python3 /usr/local/bin/radio-cache-configs || true
 
 # 4. Update MPD config
 echo "→ Updating MPD config..."
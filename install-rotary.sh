@@ -126,15 +126,19 @@ echo "→ Deploying configuration and scripts..."
 
 # Copy scripts (note: no oled-display for this variant)
 sudo copy_file_safe bin/radio_lib.py /usr/local/bin/
+sudo copy_file_safe bin/radio_cache.py /usr/local/bin/
 sudo copy_file_safe bin/rotary-controller /usr/local/bin/
 sudo copy_file_safe bin/radio-play /usr/local/bin/
 sudo copy_file_safe bin/update-stations /usr/local/bin/
-sudo chmod +x /usr/local/bin/{rotary-controller,radio-play,update-stations}
+sudo copy_file_safe bin/radio-cache-configs /usr/local/bin/
+sudo chmod +x /usr/local/bin/{rotary-controller,radio-play,update-stations,radio-cache-configs}
 
 # Copy configs (use rotary-specific hardware config)
 sudo copy_file_safe config/hardware-rotary.yaml /home/radio/
 sudo copy_file_safe config/stations.yaml /home/radio/
 sudo chown radio:radio /home/radio/*.yaml
+# Pre-parse configs to JSON so scripts skip YAML parsing at startup
+sudo -u radio /usr/bin/python3 /usr/local/bin/radio-cache-configs || true
 
 # Copy MPD config
 sudo copy_file_safe etc/mpd.conf /etc/mpd.conf
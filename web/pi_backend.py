@@ -7,18 +7,62 @@ Run this on the Raspberry Pi. It executes a small whitelist of local commands
 
 from __future__ import annotations
 
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from collections import OrderedDict
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gzip
+import hashlib
 import json
 import mimetypes
+from operator import itemgetter
 import os
 from pathlib import Path
 import re
+import select
 import shlex
+import shutil
+import socket
 import subprocess
-from typing import Any
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO
 
 import yaml
 
+try:
+    import radio_cache
+except ImportError:
+    # The module lives in ../bin of the checkout, and deploy/install also
+    # copy it to /usr/local/bin alongside radio_lib.
+    sys.path += [str(Path(__file__).resolve().parent.parent / "bin"), "/usr/local/bin"]
+    import radio_cache
+
+try:
+    import mpd
+except ImportError:  # python-mpd2 not installed: fall back to exec'ing mpc
+    mpd = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # OPT_NON_STR_KEYS keeps stdlib behaviour for the int-keyed bank maps.
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    # Accepts bytes, bytearray or str; orjson.JSONDecodeError subclasses
+    # json.JSONDecodeError, so callers catch the stdlib exception either way.
+    _loads = orjson.loads
+else:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
 BIND_HOST = os.getenv("BIND_HOST", "0.0.0.0")
 BIND_PORT = int(os.getenv("BIND_PORT", "8080"))
 RADIO_PLAY_CMD = os.getenv("RADIO_PLAY_CMD", "radio-play")
@@ -31,6 +75,9 @@ SETUP_APPLY_CMD = os.getenv("RADIO_SETUP_APPLY_CMD", "/usr/bin/sudo /usr/local/l
 STATIONS_FILE = Path(os.getenv("RADIO_STATIONS_FILE", "/home/radio/stations.yaml"))
 HARDWARE_CONFIG_FILE = Path(os.getenv("RADIO_HARDWARE_CONFIG_FILE", "/home/radio/hardware-rotary.yaml"))
 UPDATE_STATIONS_CMD = os.getenv("RADIO_UPDATE_STATIONS_CMD", "/usr/local/bin/update-stations")
+WEB_STATIC_CACHE = os.getenv("WEB_STATIC_CACHE", "1") == "1"
+MPD_HOST = os.getenv("RADIO_MPD_HOST", "127.0.0.1")
+MPD_PORT = int(os.getenv("RADIO_MPD_PORT", "6600"))
 
 # Admin / maintenance settings
 _SCRIPT_DIR = Path(__file__).resolve().parent
@@ -38,18 +85,304 @@ REPO_DIR = Path(os.getenv("RADIO_REPO_DIR", str(_SCRIPT_DIR.parent)))
 DEPLOY_SCRIPT = Path(os.getenv("RADIO_DEPLOY_SCRIPT", str(_SCRIPT_DIR.parent / "deploy-rotary.sh")))
 ADMIN_LOG_FILE = Path(os.getenv("RADIO_ADMIN_LOG_FILE", "/tmp/radio-admin.log"))
 
-ALLOWED_COMMANDS = [
-    r"^mpc\s+(play|pause|stop|next|prev|volume\s+\d{1,3})$",
-    r"^radio-play\s+\d+\s+\d+$",
-    r"^sudo\s+shutdown\s+-h\s+now$",
-]
+# Executables resolved once at startup. Passing an absolute argv[0] skips the
+# PATH search per call and lets CPython's subprocess take its posix_spawn /
+# vfork fast path instead of a full fork() of the server process.
+_MPC = shutil.which("mpc") or "mpc"
+_RADIO = shutil.which(RADIO_PLAY_CMD) or RADIO_PLAY_CMD
+_SUDO = shutil.which("sudo") or "sudo"
+
+# Allowed commands:
+#   mpc play|pause|stop|next|prev
+#   mpc volume <0-999>
+#   radio-play <bank> <station>
+#   sudo shutdown -h now
+_MPC_VERBS = frozenset({"play", "pause", "stop", "next", "prev"})
+_SHUTDOWN_ARGS = ["shutdown", "-h", "now"]
+
+# mpc verb -> MPD protocol call on the shared client.
+_MPD_ACTIONS = {
+    "play": ("play",),
+    "pause": ("pause", 1),
+    "stop": ("stop",),
+    "next": ("next",),
+    "prev": ("previous",),
+}
+
+# One long-lived MPD connection shared by all handler threads. Connected
+# lazily on first use and dropped on error so the next call reconnects.
+_MPD_LOCK = threading.Lock()
+_MPD_CLIENT = None
+
+# relative path -> ((st_mtime_ns, st_size), content, gzipped content or None,
+# content type, Content-Length of content, Content-Length of gzipped content,
+# ETag). Entries are revalidated with one stat() per request, so edited
+# assets are picked up without a restart.
+_STATIC_CACHE: dict[str, tuple[tuple[int, int], bytes, bytes | None, str, str, str, str]] = {}
+# Larger files are not held in memory; they are sent with sendfile() instead.
+_STATIC_CACHE_MAX_SIZE = 1 << 20
+_COMPRESSIBLE_TYPES = frozenset({"application/javascript", "application/json", "image/svg+xml"})
+_STATIC_CACHE_LOCK = threading.Lock()
+
+
+def _scan_web_root() -> dict[str, str]:
+    try:
+        root = WEB_ROOT.resolve()
+        entries = list(root.iterdir())
+    except OSError:
+        return {}
+    files = {}
+    for entry in entries:
+        # Skip anything (e.g. a symlink) that does not really live in the root.
+        if entry.is_file() and entry.resolve().parent == root:
+            files[entry.name] = mimetypes.guess_type(entry.name)[0] or "application/octet-stream"
+    # WEB_DEFAULT_PAGE / WEB_SETUP_PAGE may name a file in a subdirectory.
+    for page in (DEFAULT_PAGE, SETUP_PAGE):
+        if page not in files:
+            target = (root / page).resolve()
+            if target.is_file() and root in target.parents:
+                files[page] = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+    return files
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Return True if an Accept-Encoding header value allows gzip.
+
+    gzip must be listed with q > 0, or, when it is not listed at all, "*"
+    with q > 0. "gzip;q=0" and an absent header both mean identity only.
+    """
+    wildcard = False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "x-gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            wildcard = q > 0
+        else:
+            return q > 0
+    return wildcard
+
+
+# Servable file name -> content type. Only single-segment paths are routed to
+# static files, so the top level of WEB_ROOT (plus the two configured pages)
+# is scanned once at startup; a file added later needs a backend restart.
+_ALLOWED_FILES = _scan_web_root()
+_WEB_ROOT_DIR = str(WEB_ROOT)
+
+# Fixed headers of every JSON response (see _write_prebuilt_json).
+_JSON_HEADERS = b"Content-Type: application/json\r\nAccess-Control-Allow-Origin: *\r\n"
+
+# Bodies of the GET /config and /setup/config responses. Both depend only on
+# settings fixed at startup (plus the setup-mode flag), so serialize them once.
+_CONFIG_BYTES = _dumps(
+    {
+        "mode": "local",
+        "bind_host": BIND_HOST,
+        "bind_port": BIND_PORT,
+        "radio_play_cmd": RADIO_PLAY_CMD,
+    }
+)
+_SETUP_CFG_TRUE = _dumps({"success": True, "setup_mode": True, "setup_page": SETUP_PAGE})
+_SETUP_CFG_FALSE = _dumps({"success": True, "setup_mode": False, "setup_page": SETUP_PAGE})
+
+# Request bodies are small JSON objects (setup form, station source URL).
+# Anything larger is refused before reading; each server thread reuses one
+# receive buffer.
+_MAX_BODY = 4096
+_BODY_BUFFER = threading.local()
+
+# libyaml's C loader when PyYAML was built with it.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# path -> ((st_mtime_ns, st_size), parsed YAML), least recently used first.
+# stations.yaml and hardware-rotary.yaml are re-read on most UI requests but
+# rarely change, so parse them again only when their stat() stamp moves.
+_YAML_CACHE: OrderedDict[Path, tuple[tuple[int, int], Any]] = OrderedDict()
+_YAML_CACHE_LOCK = threading.Lock()
+_YAML_CACHE_MAX = 16
+
+# Held by requests that read, modify and write back hardware-rotary.yaml, so
+# concurrent POSTs cannot each save their change over the same old config.
+_HARDWARE_CONFIG_LOCK = threading.Lock()
+
+# ((st_ino, st_mtime_ns, st_size), parsed key=value pairs) of the last state
+# file read. Writers replace the file atomically, so the inode changes too.
+_STATE_CACHE: tuple[tuple[int, int, int], dict[str, str]] | None = None
+
+# The setup marker only changes during provisioning, so the setup pages'
+# polling re-checks it at most once per TTL instead of stat()ing every time.
+_SETUP_MODE_TTL = 1.0
+_SETUP_MODE_CACHE: dict[str, Any] = {"value": False, "checked": float("-inf")}
+
+HOSTNAME_CHARS = b"abcdefghijklmnopqrstuvwxyz0123456789-"
+AUTO_UPDATE_HEADER_RE = re.compile(r"auto_update:[ \t]*(?:#.*)?\r?$")
+BLOCK_KEY_RE = re.compile(r"([ \t]+)([^\s:#]+):(?:[ \t]|\r?$)")
+# One pass over bare `mpc` output: group 1 is the player state, group 2 the volume.
+MPC_STATUS_RE = re.compile(rb"^\[(playing|paused)\]|volume:\s*(\d+)%", re.MULTILINE)
+
+
+def load_yaml_cached(path: Path, *, copy: bool = False) -> Any:
+    """Parse a YAML file, reusing the previous result while it is unchanged.
+
+    Entries are keyed by path and validated against (st_mtime_ns, st_size).
+    The cached object is shared between requests, so callers that mutate the
+    result must pass copy=True. Raises the same errors as reading and parsing
+    the file directly.
+    """
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _YAML_CACHE_LOCK:
+        entry = _YAML_CACHE.get(path)
+        fresh = entry is not None and entry[0] == stamp
+        if fresh:
+            _YAML_CACHE.move_to_end(path)
+    if fresh:
+        data = entry[1]
+    else:
+        # Parsed YAML is mirrored to the .json cache shared with bin/radio_lib.py.
+        data = radio_cache.read_json_cache(path, st)
+        if data is None:
+            data = yaml.load(path.read_text(encoding="utf-8"), Loader=_YAML_LOADER)
+            _refresh_json_cache(path, data, st)
+        with _YAML_CACHE_LOCK:
+            _YAML_CACHE[path] = (stamp, data)
+            _YAML_CACHE.move_to_end(path)
+            while len(_YAML_CACHE) > _YAML_CACHE_MAX:
+                _YAML_CACHE.popitem(last=False)
+    return deepcopy(data) if copy else data
+
+
+def _yaml_cache_invalidate(path: Path) -> None:
+    with _YAML_CACHE_LOCK:
+        _YAML_CACHE.pop(path, None)
+
+
+def _refresh_json_cache(path: Path, data: Any, st: os.stat_result) -> None:
+    """Best-effort rewrite of path's .json cache; the YAML stays the source."""
+    try:
+        radio_cache.write_json_cache(path, data, st)
+    except (OSError, ValueError):
+        pass
+
+
+def _sorted_entries(mapping: Any) -> list[tuple[int, dict[str, Any]]]:
+    """Return (int index, entry) pairs of a bank/station map in index order.
+
+    Entries that are not mappings are skipped; anything but a dict yields [].
+    """
+    if not isinstance(mapping, dict):
+        return []
+    return sorted(
+        ((int(index), entry) for index, entry in mapping.items() if isinstance(entry, dict)),
+        key=itemgetter(0),
+    )
+
+
+def set_auto_update_value(text: str, key: str, value: Any) -> str | None:
+    """Return hardware config text with auto_update.<key> set to value.
+
+    Only the one line is rewritten (or inserted), so comments and layout in
+    the rest of the file survive. An existing trailing comment on that line
+    is dropped. Returns None when auto_update is not a plain block mapping
+    (e.g. flow style). The result is not validated; see
+    save_auto_update_setting().
+    """
+    rendered = ("true" if value else "false") if isinstance(value, bool) else json.dumps(value)
+    lines = text.splitlines(keepends=True)
+    header = None
+    for i, line in enumerate(lines):
+        if line.startswith("auto_update:"):
+            if not AUTO_UPDATE_HEADER_RE.match(line):
+                return None
+            header = i
+            break
+    if header is None:
+        separator = "" if not text or text.endswith("\n") else "\n"
+        return f"{text}{separator}auto_update:\n  {key}: {rendered}\n"
+
+    indent = None
+    for i in range(header + 1, len(lines)):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if line[0] not in " \t":
+            break
+        match = BLOCK_KEY_RE.match(line)
+        if match is None:
+            continue
+        if indent is None:
+            indent = match.group(1)
+        if match.group(1) == indent and match.group(2) == key:
+            lines[i] = f"{indent}{key}: {rendered}" + ("\n" if line.endswith("\n") else "")
+            return "".join(lines)
+
+    lines.insert(header + 1, f"{indent or '  '}{key}: {rendered}\n")
+    return "".join(lines)
+
+
+def save_auto_update_setting(config: dict[str, Any], key: str, value: Any) -> None:
+    """Persist config (already holding auto_update.<key> = value) to disk.
+
+    Prefers a one-line edit of the existing file and falls back to a full
+    yaml.safe_dump when the edited text would not parse back to config.
+    The file is replaced atomically and keeps its permissions. Callers hold
+    _HARDWARE_CONFIG_LOCK from loading config until this returns. Raises
+    OSError on failure.
+    """
+    try:
+        text = set_auto_update_value(HARDWARE_CONFIG_FILE.read_text(encoding="utf-8"), key, value)
+        if text is not None and yaml.load(text, Loader=_YAML_LOADER) != config:
+            text = None
+    except (FileNotFoundError, yaml.YAMLError):
+        text = None
+    if text is None:
+        text = yaml.safe_dump(config, sort_keys=False, default_flow_style=False)
 
-HOSTNAME_PATTERN = re.compile(r"^[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?$")
+    try:
+        mode = HARDWARE_CONFIG_FILE.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, tmp = tempfile.mkstemp(dir=str(HARDWARE_CONFIG_FILE.parent), prefix=HARDWARE_CONFIG_FILE.name + ".")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp, mode)
+        os.replace(tmp, HARDWARE_CONFIG_FILE)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    _yaml_cache_invalidate(HARDWARE_CONFIG_FILE)
+    _refresh_json_cache(HARDWARE_CONFIG_FILE, config, os.stat(HARDWARE_CONFIG_FILE))
+
+
+def parse_state(data: bytes) -> dict[str, str]:
+    """Parse the key=value state file with the same rules as radio_lib.read_state.
+
+    Blank lines and lines starting with "#" are skipped; keys and values are
+    stripped of surrounding whitespace.
+    """
+    parsed: dict[str, str] = {}
+    for line in data.decode("utf-8", "replace").splitlines():
+        line = line.strip()
+        if line and "=" in line and line[0] != "#":
+            key, _, value = line.partition("=")
+            parsed[key.strip()] = value.strip()
+    return parsed
 
 
 def _lookup_station_names(bank: int, station: int) -> tuple[str, str]:
     try:
-        data = yaml.safe_load(STATIONS_FILE.read_text(encoding="utf-8")) or {}
+        data = load_yaml_cached(STATIONS_FILE) or {}
     except (FileNotFoundError, OSError, yaml.YAMLError):
         return "", ""
 
@@ -72,26 +405,118 @@ def _lookup_station_names(bank: int, station: int) -> tuple[str, str]:
     return str(bank_data.get("name", "") or ""), str(station_data.get("name", "") or "")
 
 
-def is_command_allowed(command: str) -> bool:
-    cmd = command.strip()
-    return any(re.match(pattern, cmd) for pattern in ALLOWED_COMMANDS)
+def classify_command(command: str) -> tuple[str, list[str]] | None:
+    """Return (kind, argv) for a whitelisted command, else None.
+
+    kind is "mpc", "radio-play" or "shutdown"; argv is ready to execute, with
+    argv[0] already resolved to the executable's path.
+    """
+    tokens = command.split()
+    count = len(tokens)
+    if not count:
+        return None
+
+    head = tokens[0]
+    if head == "mpc":
+        if count == 2 and tokens[1] in _MPC_VERBS:
+            return "mpc", [_MPC, tokens[1]]
+        if count == 3 and tokens[1] == "volume" and len(tokens[2]) <= 3 and tokens[2].isdecimal():
+            return "mpc", [_MPC, "volume", tokens[2]]
+        return None
+    if head == "radio-play":
+        if count == 3 and tokens[1].isdecimal() and tokens[2].isdecimal():
+            return "radio-play", [_RADIO, tokens[1], tokens[2]]
+        return None
+    if head == "sudo" and tokens[1:] == _SHUTDOWN_ARGS:
+        return "shutdown", [_SUDO, *_SHUTDOWN_ARGS]
+    return None
 
 
-def command_to_argv(command: str) -> list[str]:
-    argv = shlex.split(command)
-    if argv and argv[0] == "radio-play":
-        argv[0] = RADIO_PLAY_CMD
-    return argv
+def is_command_allowed(command: str) -> bool:
+    return classify_command(command) is not None
 
 
-def is_setup_mode() -> bool:
-    return SETUP_MARKER_FILE.exists()
+def _mpd_drop() -> None:
+    global _MPD_CLIENT
+    client, _MPD_CLIENT = _MPD_CLIENT, None
+    if client is not None:
+        try:
+            client.disconnect()
+        except Exception:
+            pass
+
+
+def mpd_call(func):
+    """Run func(client) on the shared MPD connection under the lock.
+
+    A dropped connection is retried once on a fresh client; protocol errors
+    (mpd.CommandError) are passed through to the caller.
+    """
+    global _MPD_CLIENT
+    with _MPD_LOCK:
+        for attempt in range(2):
+            try:
+                if _MPD_CLIENT is None:
+                    client = mpd.MPDClient()
+                    client.timeout = 3
+                    client.connect(MPD_HOST, MPD_PORT)
+                    _MPD_CLIENT = client
+                return func(_MPD_CLIENT)
+            except (mpd.ConnectionError, OSError):
+                _mpd_drop()
+                if attempt:
+                    raise
+
+
+def _status_and_song(client) -> list[dict[str, Any]]:
+    # One command list = one round trip for both replies.
+    client.command_list_ok_begin()
+    client.status()
+    client.currentsong()
+    return client.command_list_end()
+
+
+def format_song(song: dict[str, Any]) -> str:
+    """Format a currentsong() dict the way `mpc current` does by default."""
+
+    def tag(name: str) -> str:
+        value = song.get(name) or ""
+        return value[0] if isinstance(value, list) else value
+
+    name, artist, title = tag("name"), tag("artist"), tag("title")
+    if artist and title:
+        title = f"{artist} - {title}"
+    if name and title:
+        return f"{name}: {title}"
+    return name or title or tag("file")
+
+
+def is_setup_mode(*, fresh: bool = False) -> bool:
+    """Return whether the setup marker file exists.
+
+    The answer may be up to _SETUP_MODE_TTL seconds old unless fresh=True,
+    which endpoints that change the system pass to check the marker now.
+    """
+    now = time.monotonic()
+    if fresh or now - _SETUP_MODE_CACHE["checked"] >= _SETUP_MODE_TTL:
+        _SETUP_MODE_CACHE["value"] = SETUP_MARKER_FILE.exists()
+        _SETUP_MODE_CACHE["checked"] = now
+    return _SETUP_MODE_CACHE["value"]
 
 
 def normalize_hostname(hostname: str) -> str:
     return hostname.strip().lower()
 
 
+def is_valid_hostname(hostname: str) -> bool:
+    """Check a single lowercase DNS label: [a-z0-9-], 1-63 chars, no edge hyphens."""
+    if not hostname.isascii():
+        return False
+    raw = hostname.encode("ascii")
+    # translate() deletes every allowed byte in one C pass; leftovers are invalid.
+    return 0 < len(raw) <= 63 and raw[0] != 0x2D and raw[-1] != 0x2D and not raw.translate(None, HOSTNAME_CHARS)
+
+
 def validate_setup_payload(data: dict[str, Any]) -> tuple[dict[str, str], dict[str, str]]:
     errors: dict[str, str] = {}
 
@@ -111,191 +536,203 @@ def validate_setup_payload(data: dict[str, Any]) -> tuple[dict[str, str], dict[s
 
     if not hostname:
         errors["hostname"] = "Hostname is required"
-    elif len(hostname) > 63 or HOSTNAME_PATTERN.match(hostname) is None:
+    elif not is_valid_hostname(hostname):
         errors["hostname"] = "Hostname must be lowercase letters, numbers, hyphens, and 63 chars max"
 
     return {"ssid": ssid, "password": password, "hostname": hostname}, errors
 
 
 class CommandHandler(BaseHTTPRequestHandler):
+    # Keep-alive lets the UI's status polling reuse one connection. Every
+    # response must therefore carry a Content-Length; idle connections are
+    # dropped after `timeout` seconds.
+    protocol_version = "HTTP/1.1"
+    timeout = 60
+
+    def setup(self):
+        super().setup()
+        # Small JSON replies should not wait on Nagle + delayed ACK, and
+        # keepalive probes reap connections from vanished browser tabs.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
-    def do_GET(self):
-        if self.path in {"/", ""}:
-            self._send_static_file(DEFAULT_PAGE)
-            return
-
-        if self.path == f"/{DEFAULT_PAGE}":
-            self._send_static_file(DEFAULT_PAGE)
-            return
-
-        if self.path in {"/setup", "/setup.html", f"/{SETUP_PAGE}"}:
-            self._send_static_file(SETUP_PAGE)
-            return
-
-        if self.path == "/config":
-            self.send_json_response(
-                200,
-                {
-                    "mode": "local",
-                    "bind_host": BIND_HOST,
-                    "bind_port": BIND_PORT,
-                    "radio_play_cmd": RADIO_PLAY_CMD,
-                },
-            )
-            return
+    # path -> handler method name
+    _GET_ROUTES = {
+        "/setup": "_route_setup_page",
+        "/setup.html": "_route_setup_page",
+        f"/{SETUP_PAGE}": "_route_setup_page",
+        # After the setup entries so the default page wins on a name clash.
+        "/": "_route_default_page",
+        "": "_route_default_page",
+        f"/{DEFAULT_PAGE}": "_route_default_page",
+        "/config": "_route_config",
+        "/stations": "_send_stations_directory",
+        "/stations/source": "_send_stations_source",
+        "/setup/config": "_route_setup_config",
+        "/admin/log": "_get_admin_log",
+        "/admin/service-logs": "_get_service_logs",
+        "/admin/version": "_get_version",
+        "/admin/debug": "_get_debug_info",
+    }
+
+    # path -> (handler method name, body optional, handler takes the body)
+    _POST_ROUTES = {
+        "/command": ("_route_command", True, True),
+        "/status": ("_send_status", True, False),
+        "/state": ("_send_state", True, False),
+        "/setup/apply": ("_apply_setup", False, True),
+        "/stations/source": ("_update_stations_source", False, True),
+        "/stations/refresh": ("_refresh_stations_directory", True, False),
+        "/stations/auto-update": ("_set_stations_auto_update", False, True),
+        "/admin/update": ("_start_update", True, False),
+        "/admin/reboot": ("_do_reboot", True, False),
+        "/admin/restart": ("_restart_service", True, False),
+    }
 
-        if self.path == "/stations":
-            self._send_stations_directory()
+    def do_GET(self):
+        route = self._GET_ROUTES.get(self.path)
+        if route is not None:
+            getattr(self, route)()
             return
 
-        if self.path == "/stations/source":
-            self._send_stations_source()
+        path = self.path
+        if len(path) > 1 and path[0] == "/" and "/" not in path[1:]:
+            self._send_static_file(path[1:])
             return
 
-        if self.path == "/setup/config":
-            self.send_json_response(
-                200,
-                {
-                    "success": True,
-                    "setup_mode": is_setup_mode(),
-                    "setup_page": SETUP_PAGE,
-                },
-            )
-            return
+        self.send_error(404)
 
-        if self.path == "/admin/log":
-            self._get_admin_log()
-            return
+    def _route_default_page(self):
+        self._send_static_file(DEFAULT_PAGE)
 
-        if self.path == "/admin/service-logs":
-            self._get_service_logs()
-            return
+    def _route_setup_page(self):
+        self._send_static_file(SETUP_PAGE)
 
-        if self.path == "/admin/version":
-            self._get_version()
-            return
+    def _route_config(self):
+        self._write_prebuilt_json(200, _CONFIG_BYTES)
 
-        if self.path == "/admin/debug":
-            self._get_debug_info()
-            return
+    def _route_setup_config(self):
+        self._write_prebuilt_json(200, _SETUP_CFG_TRUE if is_setup_mode() else _SETUP_CFG_FALSE)
 
-        if self.path.startswith("/") and self.path.count("/") == 1 and not self.path.endswith("/"):
-            self._send_static_file(self.path[1:])
+    def _send_static_file(self, relative_path: str):
+        content_type = _ALLOWED_FILES.get(relative_path)
+        if content_type is None:
+            self.send_error(404)
             return
 
-        self.send_error(404)
-
-    def _send_static_file(self, relative_path: str):
         try:
-            requested = (WEB_ROOT / relative_path).resolve()
-            if WEB_ROOT not in requested.parents and requested != WEB_ROOT:
-                self.send_error(403)
-                return
-            if not requested.is_file():
-                self.send_error(404)
+            path = os.path.join(_WEB_ROOT_DIR, relative_path)
+            cached = None
+            if WEB_STATIC_CACHE:
+                st = os.stat(path)
+                with _STATIC_CACHE_LOCK:
+                    cached = _STATIC_CACHE.get(relative_path)
+                if cached is not None and cached[0] != (st.st_mtime_ns, st.st_size):
+                    cached = None
+            if cached is None:
+                with open(path, "rb") as f:
+                    st = os.fstat(f.fileno())
+                    if not WEB_STATIC_CACHE or st.st_size > _STATIC_CACHE_MAX_SIZE:
+                        self._stream_file(f, st.st_size, content_type)
+                        return
+                    content = f.read()
+                gzipped = None
+                if content_type.startswith("text/") or content_type in _COMPRESSIBLE_TYPES:
+                    gzipped = gzip.compress(content, 6)
+                    if len(gzipped) >= len(content):
+                        gzipped = None
+                etag = f'"{hashlib.blake2b(content, digest_size=8).hexdigest()}"'
+                cached = (
+                    (st.st_mtime_ns, st.st_size),
+                    content,
+                    gzipped,
+                    content_type,
+                    str(len(content)),
+                    str(len(gzipped or b"")),
+                    etag,
+                )
+                with _STATIC_CACHE_LOCK:
+                    _STATIC_CACHE[relative_path] = cached
+
+            _stamp, content, gzipped, content_type, content_length, gzipped_length, etag = cached
+            use_gzip = gzipped is not None and _accepts_gzip(self.headers.get("Accept-Encoding", ""))
+            if use_gzip:
+                # The gzip body is a different representation, so it gets its own tag.
+                etag = etag[:-1] + '-gz"'
+
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match.replace(" ", "").split(",")):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                if gzipped is not None:
+                    self.send_header("Vary", "Accept-Encoding")
+                self.end_headers()
                 return
 
-            content_type = mimetypes.guess_type(requested.name)[0] or "application/octet-stream"
-            content = requested.read_bytes()
             self.send_response(200)
             self.send_header("Content-Type", content_type)
-            self.send_header("Content-Length", str(len(content)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "public, max-age=300")
+            if gzipped is not None:
+                self.send_header("Vary", "Accept-Encoding")
+            if use_gzip:
+                content, content_length = gzipped, gzipped_length
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", content_length)
             self.end_headers()
             self.wfile.write(content)
+        except FileNotFoundError:
+            self.send_error(404)
         except OSError as exc:
             self.send_json_response(500, {"success": False, "error": str(exc), "error_type": "io_error"})
 
-    def do_POST(self):
-        if self.path == "/command":
-            data = self._read_json_body(optional=True)
-            if data is None:
-                return
-
-            command = data.get("command", "")
-            if not is_command_allowed(command):
-                self.send_json_response(
-                    403,
-                    {
-                        "success": False,
-                        "error": f"Command not allowed: {command}",
-                        "error_type": "forbidden_command",
-                    },
-                )
-                return
-
-            self._send_local_command(command)
-            return
-
-        if self.path == "/status":
-            data = self._read_json_body(optional=True)
-            if data is None:
-                return
-            self._send_status()
-            return
-
-        if self.path == "/state":
-            data = self._read_json_body(optional=True)
-            if data is None:
-                return
-            self._send_state()
-            return
-
-        if self.path == "/setup/apply":
-            data = self._read_json_body(optional=False)
-            if data is None:
-                return
-            self._apply_setup(data)
-            return
-
-        if self.path == "/stations/source":
-            data = self._read_json_body(optional=False)
-            if data is None:
-                return
-            self._update_stations_source(data)
-            return
-
-        if self.path == "/stations/refresh":
-            data = self._read_json_body(optional=True)
-            if data is None:
-                return
-            self._refresh_stations_directory()
-            return
-
-        if self.path == "/stations/auto-update":
-            data = self._read_json_body(optional=False)
-            if data is None:
-                return
-            self._set_stations_auto_update(data)
-            return
+    def _stream_file(self, f: BinaryIO, size: int, content_type: str):
+        # socket.sendfile() uses os.sendfile() where available, so the kernel
+        # copies straight from the page cache; it falls back to send() loops.
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        self.connection.sendfile(f, 0, size)
 
-        if self.path == "/admin/update":
-            data = self._read_json_body(optional=True)
-            if data is None:
-                return
-            self._start_update()
+    def do_POST(self):
+        route = self._POST_ROUTES.get(self.path)
+        if route is None:
+            self.send_error(404)
             return
 
-        if self.path == "/admin/reboot":
-            data = self._read_json_body(optional=True)
-            if data is None:
-                return
-            self._do_reboot()
+        name, optional, takes_body = route
+        data = self._read_json_body(optional=optional)
+        if data is None:
             return
-
-        if self.path == "/admin/restart":
-            data = self._read_json_body(optional=True)
-            if data is None:
-                return
-            self._restart_service()
+        if takes_body:
+            getattr(self, name)(data)
+        else:
+            getattr(self, name)()
+
+    def _route_command(self, data: dict[str, Any]):
+        command = data.get("command", "")
+        classified = classify_command(command) if isinstance(command, str) else None
+        if classified is None:
+            self.send_json_response(
+                403,
+                {
+                    "success": False,
+                    "error": f"Command not allowed: {command}",
+                    "error_type": "forbidden_command",
+                },
+            )
             return
 
-        self.send_error(404)
+        self._send_local_command(command, *classified)
 
     def _read_json_body(self, optional: bool = False) -> dict[str, Any] | None:
         content_length = self.headers.get("Content-Length")
@@ -303,10 +740,29 @@ class CommandHandler(BaseHTTPRequestHandler):
             return {}
 
         try:
-            body = self.rfile.read(int(content_length or "0"))
-            if not body and optional:
+            length = int(content_length or "0")
+            if length < 0:
+                raise ValueError("negative Content-Length")
+            if length > _MAX_BODY:
+                # The body is left unread, so this connection cannot be reused.
+                self.close_connection = True
+                self.send_json_response(
+                    413,
+                    {
+                        "success": False,
+                        "error": f"Request body exceeds {_MAX_BODY} bytes",
+                        "error_type": "payload_too_large",
+                    },
+                )
+                return None
+
+            buf = getattr(_BODY_BUFFER, "buf", None)
+            if buf is None:
+                buf = _BODY_BUFFER.buf = bytearray(_MAX_BODY)
+            received = self.rfile.readinto(memoryview(buf)[:length])
+            if not received and optional:
                 return {}
-            return json.loads(body.decode("utf-8"))
+            return _loads(buf[:received])
         except (ValueError, json.JSONDecodeError):
             self.send_json_response(
                 400,
@@ -327,8 +783,81 @@ class CommandHandler(BaseHTTPRequestHandler):
     ) -> subprocess.CompletedProcess[str]:
         return subprocess.run(argv, capture_output=True, text=True, timeout=timeout, input=input_text)
 
+    def _run_fast(self, argv: list[str], *, timeout: float = 10) -> tuple[int, bytes, bytes]:
+        """Run argv and return (returncode, stdout, stderr) as raw bytes.
+
+        A lighter _run_local for short-output commands: both pipes are drained
+        with one poll() loop on this thread instead of communicate()'s helper
+        machinery, and nothing is decoded unless the caller needs it.
+        """
+        proc = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        deadline = time.monotonic() + timeout
+        out = bytearray()
+        err = bytearray()
+        buffers = {proc.stdout.fileno(): out, proc.stderr.fileno(): err}
+        poller = select.poll()
+        for fd in buffers:
+            poller.register(fd, select.POLLIN)
+        try:
+            while buffers:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(argv, timeout, bytes(out), bytes(err))
+                for fd, _event in poller.poll(remaining * 1000):
+                    chunk = os.read(fd, 4096)
+                    if chunk:
+                        buffers[fd] += chunk
+                    else:
+                        poller.unregister(fd)
+                        del buffers[fd]
+            returncode = proc.wait(timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            proc.stdout.close()
+            proc.stderr.close()
+        return returncode, bytes(out), bytes(err)
+
+    def _run_update_stations(self, github_url: str) -> tuple[subprocess.CompletedProcess[str], dict[str, Any]]:
+        """Run update-stations for github_url and return (result, its JSON summary).
+
+        The summary comes back on a dedicated pipe (--json-fd) so it never has
+        to be picked out of log output. An update-stations that predates the
+        flag is rerun with --json and its last stdout line is parsed instead.
+        Raises subprocess.TimeoutExpired like _run_local.
+        """
+        argv = ["/usr/bin/python3", UPDATE_STATIONS_CMD, "--url", github_url]
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(read_fd, "rb") as reader:
+            try:
+                result = subprocess.run(
+                    [*argv, "--json-fd", str(write_fd)],
+                    capture_output=True,
+                    text=True,
+                    timeout=45,
+                    pass_fds=(write_fd,),
+                )
+            finally:
+                os.close(write_fd)
+            summary = reader.read()
+
+        if not summary and result.returncode == 2 and "--json-fd" in result.stderr:
+            result = self._run_local([*argv, "--json"], timeout=45)
+            # The JSON line may follow log output; take the last line.
+            summary = result.stdout.strip().rsplit("\n", 1)[-1]
+
+        update_result: Any = {}
+        if summary:
+            try:
+                update_result = _loads(summary)
+            except json.JSONDecodeError:
+                pass
+        return result, update_result if isinstance(update_result, dict) else {}
+
     def _apply_setup(self, data: dict[str, Any]):
-        if not is_setup_mode():
+        if not is_setup_mode(fresh=True):
             self.send_json_response(
                 403,
                 {"success": False, "error": "Setup mode is not enabled", "error_type": "setup_mode_disabled"},
@@ -369,7 +898,7 @@ class CommandHandler(BaseHTTPRequestHandler):
             output = result.stdout.strip()
             if output:
                 try:
-                    data = json.loads(output)
+                    data = _loads(output)
                     if isinstance(data, dict):
                         self.send_json_response(200, data)
                         return
@@ -385,22 +914,25 @@ class CommandHandler(BaseHTTPRequestHandler):
                 {"success": False, "error": f"Apply command missing: {exc}", "error_type": "command_not_found"},
             )
 
-    def _send_local_command(self, command: str):
+    def _send_local_command(self, command: str, kind: str, argv: list[str]):
+        if mpd is not None and kind == "mpc":
+            self._send_mpd_command(command, argv)
+            return
         try:
-            result = self._run_local(command_to_argv(command))
-            if result.returncode == 0:
+            returncode, stdout, stderr = self._run_fast(argv)
+            if returncode == 0:
                 self.send_json_response(
                     200,
-                    {"success": True, "output": result.stdout.strip(), "command": command},
+                    {"success": True, "output": stdout.decode("utf-8", "replace").strip(), "command": command},
                 )
             else:
                 self.send_json_response(
                     200,
                     {
                         "success": False,
-                        "error": result.stderr.strip() or "Command failed",
+                        "error": stderr.decode("utf-8", "replace").strip() or "Command failed",
                         "error_type": "command_failed",
-                        "exit_code": result.returncode,
+                        "exit_code": returncode,
                     },
                 )
         except subprocess.TimeoutExpired:
@@ -411,26 +943,77 @@ class CommandHandler(BaseHTTPRequestHandler):
                 {"success": False, "error": f"Command not found: {exc}", "error_type": "command_not_found"},
             )
 
-    def _send_status(self):
+    def _send_mpd_command(self, command: str, argv: list[str]):
+        if argv[1] == "volume":
+            method, *args = "setvol", int(argv[2])
+        else:
+            method, *args = _MPD_ACTIONS[argv[1]]
         try:
-            current_result = self._run_local(["mpc", "current"])
-            status_result = self._run_local(["mpc", "status"])
+            mpd_call(lambda client: getattr(client, method)(*args))
+        except (mpd.MPDError, OSError) as exc:
+            self.send_json_response(
+                200,
+                {"success": False, "error": str(exc) or "Command failed", "error_type": "command_failed", "exit_code": 1},
+            )
+            return
+        self.send_json_response(200, {"success": True, "output": "", "command": command})
 
-            current_track = current_result.stdout.strip() if current_result.returncode == 0 else ""
-            status_text = status_result.stdout
-            volume = 50
-            volume_match = re.search(r"volume:\s*(\d+)%", status_text)
-            if volume_match:
-                volume = int(volume_match.group(1))
+    def _send_mpd_status(self):
+        try:
+            status, song = mpd_call(_status_and_song)
+        except (mpd.MPDError, OSError):
+            status, song = {}, {}
+
+        player_state = status.get("state", "")
+        current_track = format_song(song) if player_state in ("play", "pause") else ""
+        volume = int(status.get("volume", "-1"))
+        self.send_json_response(
+            200,
+            {
+                "success": True,
+                "current_track": current_track,
+                "is_playing": player_state == "play",
+                "is_paused": player_state == "pause",
+                "volume": volume if volume >= 0 else 50,
+            },
+        )
+
+    def _send_status(self):
+        if mpd is not None:
+            self._send_mpd_status()
+            return
+        try:
+            # Bare `mpc` prints the current song, the [playing]/[paused] line
+            # and the volume line in one go (only the volume line when stopped).
+            returncode, stdout, _stderr = self._run_fast([_MPC])
+
+            player_match = None
+            volume = None
+            for match in MPC_STATUS_RE.finditer(stdout):
+                if match.group(1):
+                    if player_match is None:
+                        player_match = match
+                elif volume is None:
+                    volume = int(match.group(2))
+                if player_match is not None and volume is not None:
+                    break
+
+            current_track = ""
+            player_state = b""
+            if player_match is not None:
+                player_state = player_match.group(1)
+                if returncode == 0:
+                    track = stdout[: player_match.start()].rstrip(b"\n").rpartition(b"\n")[2].strip()
+                    current_track = track.decode("utf-8", "replace")
 
             self.send_json_response(
                 200,
                 {
                     "success": True,
                     "current_track": current_track,
-                    "is_playing": "[playing]" in status_text,
-                    "is_paused": "[paused]" in status_text,
-                    "volume": volume,
+                    "is_playing": player_state == b"playing",
+                    "is_paused": player_state == b"paused",
+                    "volume": 50 if volume is None else volume,
                 },
             )
         except subprocess.TimeoutExpired:
@@ -440,7 +1023,7 @@ class CommandHandler(BaseHTTPRequestHandler):
 
     def _send_stations_source(self):
         try:
-            config = yaml.safe_load(HARDWARE_CONFIG_FILE.read_text(encoding="utf-8")) or {}
+            config = load_yaml_cached(HARDWARE_CONFIG_FILE) or {}
         except FileNotFoundError:
             self.send_json_response(
                 404,
@@ -490,54 +1073,52 @@ class CommandHandler(BaseHTTPRequestHandler):
 
         enabled = bool(data.get("enabled"))
 
-        try:
-            config = yaml.safe_load(HARDWARE_CONFIG_FILE.read_text(encoding="utf-8")) or {}
-        except FileNotFoundError:
-            self.send_json_response(
-                404,
-                {
-                    "success": False,
-                    "error": f"Hardware config file not found: {HARDWARE_CONFIG_FILE}",
-                    "error_type": "hardware_config_not_found",
-                },
-            )
-            return
-        except (OSError, yaml.YAMLError) as exc:
-            self.send_json_response(
-                500,
-                {
-                    "success": False,
-                    "error": str(exc),
-                    "error_type": "hardware_config_read_error",
-                },
-            )
-            return
+        with _HARDWARE_CONFIG_LOCK:
+            try:
+                config = load_yaml_cached(HARDWARE_CONFIG_FILE, copy=True) or {}
+            except FileNotFoundError:
+                self.send_json_response(
+                    404,
+                    {
+                        "success": False,
+                        "error": f"Hardware config file not found: {HARDWARE_CONFIG_FILE}",
+                        "error_type": "hardware_config_not_found",
+                    },
+                )
+                return
+            except (OSError, yaml.YAMLError) as exc:
+                self.send_json_response(
+                    500,
+                    {
+                        "success": False,
+                        "error": str(exc),
+                        "error_type": "hardware_config_read_error",
+                    },
+                )
+                return
 
-        if not isinstance(config, dict):
-            config = {}
+            if not isinstance(config, dict):
+                config = {}
 
-        auto_update = config.get("auto_update")
-        if not isinstance(auto_update, dict):
-            auto_update = {}
-            config["auto_update"] = auto_update
+            auto_update = config.get("auto_update")
+            if not isinstance(auto_update, dict):
+                auto_update = {}
+                config["auto_update"] = auto_update
 
-        auto_update["enabled"] = enabled
+            auto_update["enabled"] = enabled
 
-        try:
-            HARDWARE_CONFIG_FILE.write_text(
-                yaml.safe_dump(config, sort_keys=False, default_flow_style=False),
-                encoding="utf-8",
-            )
-        except OSError as exc:
-            self.send_json_response(
-                500,
-                {
-                    "success": False,
-                    "error": str(exc),
-                    "error_type": "hardware_config_write_error",
-                },
-            )
-            return
+            try:
+                save_auto_update_setting(config, "enabled", enabled)
+            except OSError as exc:
+                self.send_json_response(
+                    500,
+                    {
+                        "success": False,
+                        "error": str(exc),
+                        "error_type": "hardware_config_write_error",
+                    },
+                )
+                return
 
         self.send_json_response(
             200,
@@ -571,71 +1152,56 @@ class CommandHandler(BaseHTTPRequestHandler):
             )
             return
 
-        try:
-            config = yaml.safe_load(HARDWARE_CONFIG_FILE.read_text(encoding="utf-8")) or {}
-        except FileNotFoundError:
-            self.send_json_response(
-                404,
-                {
-                    "success": False,
-                    "error": f"Hardware config file not found: {HARDWARE_CONFIG_FILE}",
-                    "error_type": "hardware_config_not_found",
-                },
-            )
-            return
-        except (OSError, yaml.YAMLError) as exc:
-            self.send_json_response(
-                500,
-                {
-                    "success": False,
-                    "error": str(exc),
-                    "error_type": "hardware_config_read_error",
-                },
-            )
-            return
+        with _HARDWARE_CONFIG_LOCK:
+            try:
+                config = load_yaml_cached(HARDWARE_CONFIG_FILE, copy=True) or {}
+            except FileNotFoundError:
+                self.send_json_response(
+                    404,
+                    {
+                        "success": False,
+                        "error": f"Hardware config file not found: {HARDWARE_CONFIG_FILE}",
+                        "error_type": "hardware_config_not_found",
+                    },
+                )
+                return
+            except (OSError, yaml.YAMLError) as exc:
+                self.send_json_response(
+                    500,
+                    {
+                        "success": False,
+                        "error": str(exc),
+                        "error_type": "hardware_config_read_error",
+                    },
+                )
+                return
 
-        if not isinstance(config, dict):
-            config = {}
+            if not isinstance(config, dict):
+                config = {}
 
-        auto_update = config.get("auto_update")
-        if not isinstance(auto_update, dict):
-            auto_update = {}
-            config["auto_update"] = auto_update
+            auto_update = config.get("auto_update")
+            if not isinstance(auto_update, dict):
+                auto_update = {}
+                config["auto_update"] = auto_update
 
-        auto_update["github_url"] = github_url
+            auto_update["github_url"] = github_url
 
-        try:
-            HARDWARE_CONFIG_FILE.write_text(
-                yaml.safe_dump(config, sort_keys=False, default_flow_style=False),
-                encoding="utf-8",
-            )
-        except OSError as exc:
-            self.send_json_response(
-                500,
-                {
-                    "success": False,
-                    "error": str(exc),
-                    "error_type": "hardware_config_write_error",
-                },
-            )
-            return
+            try:
+                save_auto_update_setting(config, "github_url", github_url)
+            except OSError as exc:
+                self.send_json_response(
+                    500,
+                    {
+                        "success": False,
+                        "error": str(exc),
+                        "error_type": "hardware_config_write_error",
+                    },
+                )
+                return
 
         # Config saved — now fetch, validate, and install the stations.
         try:
-            result = self._run_local(
-                ["/usr/bin/python3", UPDATE_STATIONS_CMD, "--url", github_url, "--json"],
-                timeout=45,
-            )
-
-            update_result: dict[str, Any] = {}
-            stdout = result.stdout.strip()
-            if stdout:
-                # The JSON line may follow log output; take the last line.
-                last_line = stdout.rsplit("\n", 1)[-1]
-                try:
-                    update_result = json.loads(last_line)
-                except json.JSONDecodeError:
-                    pass
+            result, update_result = self._run_update_stations(github_url)
 
             if result.returncode == 0:
                 self.send_json_response(
@@ -672,7 +1238,7 @@ class CommandHandler(BaseHTTPRequestHandler):
 
     def _send_stations_directory(self):
         try:
-            data = yaml.safe_load(STATIONS_FILE.read_text(encoding="utf-8")) or {}
+            data = load_yaml_cached(STATIONS_FILE) or {}
         except FileNotFoundError:
             self.send_json_response(
                 404,
@@ -699,39 +1265,23 @@ class CommandHandler(BaseHTTPRequestHandler):
             self.send_json_response(200, {"success": True, "banks": []})
             return
 
-        directory: list[dict[str, Any]] = []
-        for bank_index in sorted(banks):
-            bank_data = banks.get(bank_index)
-            if not isinstance(bank_data, dict):
-                continue
-
-            stations_data = bank_data.get("stations", {})
-            stations: list[dict[str, Any]] = []
-            if isinstance(stations_data, dict):
-                for station_index in sorted(stations_data):
-                    station_data = stations_data.get(station_index)
-                    if not isinstance(station_data, dict):
-                        continue
-                    stations.append(
-                        {
-                            "station": int(station_index) + 1,
-                            "name": str(station_data.get("name", "") or ""),
-                        }
-                    )
-
-            directory.append(
-                {
-                    "bank": int(bank_index) + 1,
-                    "name": str(bank_data.get("name", "") or ""),
-                    "stations": stations,
-                }
-            )
+        directory = [
+            {
+                "bank": bank_index + 1,
+                "name": str(bank_data.get("name", "") or ""),
+                "stations": [
+                    {"station": station_index + 1, "name": str(station_data.get("name", "") or "")}
+                    for station_index, station_data in _sorted_entries(bank_data.get("stations"))
+                ],
+            }
+            for bank_index, bank_data in _sorted_entries(banks)
+        ]
 
         self.send_json_response(200, {"success": True, "banks": directory})
 
     def _refresh_stations_directory(self):
         try:
-            config = yaml.safe_load(HARDWARE_CONFIG_FILE.read_text(encoding="utf-8")) or {}
+            config = load_yaml_cached(HARDWARE_CONFIG_FILE) or {}
         except FileNotFoundError:
             self.send_json_response(
                 404,
@@ -770,19 +1320,7 @@ class CommandHandler(BaseHTTPRequestHandler):
             return
 
         try:
-            result = self._run_local(
-                ["/usr/bin/python3", UPDATE_STATIONS_CMD, "--url", github_url, "--json"],
-                timeout=45,
-            )
-
-            update_result: dict[str, Any] = {}
-            stdout = result.stdout.strip()
-            if stdout:
-                last_line = stdout.rsplit("\n", 1)[-1]
-                try:
-                    update_result = json.loads(last_line)
-                except json.JSONDecodeError:
-                    update_result = {}
+            result, update_result = self._run_update_stations(github_url)
 
             if result.returncode == 0:
                 self.send_json_response(
@@ -817,9 +1355,18 @@ class CommandHandler(BaseHTTPRequestHandler):
             )
 
     def _send_state(self):
+        global _STATE_CACHE
         try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                lines = f.read().strip().splitlines()
+            st = os.stat(STATE_FILE)
+            cached = _STATE_CACHE
+            if cached is not None and cached[0] == (st.st_ino, st.st_mtime_ns, st.st_size):
+                parsed = cached[1]
+            else:
+                with open(STATE_FILE, "rb") as f:
+                    st = os.fstat(f.fileno())
+                    data = f.read()
+                parsed = parse_state(data)
+                _STATE_CACHE = ((st.st_ino, st.st_mtime_ns, st.st_size), parsed)
         except FileNotFoundError:
             self.send_json_response(200, {"success": False, "error": f"State file not found: {STATE_FILE}"})
             return
@@ -827,12 +1374,6 @@ class CommandHandler(BaseHTTPRequestHandler):
             self.send_json_response(500, {"success": False, "error": str(exc), "error_type": "io_error"})
             return
 
-        parsed: dict[str, str] = {}
-        for line in lines:
-            if "=" in line:
-                key, value = line.split("=", 1)
-                parsed[key] = value
-
         try:
             bank = int(parsed.get("current_bank", "0") or 0)
             station = int(parsed.get("current_station", "0") or 0)
@@ -961,16 +1502,28 @@ class CommandHandler(BaseHTTPRequestHandler):
         """Return diagnostic snapshot: MPD status, state file, station type, rotary log tail."""
         info: dict[str, Any] = {"success": True}
 
-        # MPD status via mpc
+        # MPD status via mpc; both calls run concurrently.
+        procs: list[subprocess.Popen] = []
         try:
-            mpc_status = self._run_local(["mpc", "status"], timeout=5)
-            mpc_current = self._run_local(["mpc", "current"], timeout=5)
-            info["mpd_status_raw"] = mpc_status.stdout.strip() if mpc_status.returncode == 0 else mpc_status.stderr.strip()
-            info["mpd_current"] = mpc_current.stdout.strip() if mpc_current.returncode == 0 else ""
-            info["mpd_is_playing"] = "[playing]" in (mpc_status.stdout or "")
-            info["mpd_is_stopped"] = "[playing]" not in (mpc_status.stdout or "") and "[paused]" not in (mpc_status.stdout or "")
+            for verb in ("status", "current"):
+                procs.append(
+                    subprocess.Popen([_MPC, verb], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                )
+            status_proc, current_proc = procs
+            status_out, status_err = status_proc.communicate(timeout=5)
+            current_out, _current_err = current_proc.communicate(timeout=5)
+            info["mpd_status_raw"] = status_out.strip() if status_proc.returncode == 0 else status_err.strip()
+            info["mpd_current"] = current_out.strip() if current_proc.returncode == 0 else ""
+            info["mpd_is_playing"] = "[playing]" in status_out
+            info["mpd_is_stopped"] = "[playing]" not in status_out and "[paused]" not in status_out
         except Exception as exc:
             info["mpd_error"] = str(exc)
+        finally:
+            # Reap anything still running after a timeout or a failed second spawn.
+            for proc in procs:
+                if proc.returncode is None:
+                    proc.kill()
+                    proc.communicate()
 
         # State file
         try:
@@ -989,7 +1542,7 @@ class CommandHandler(BaseHTTPRequestHandler):
             state_parsed = info.get("state_file", {})
             bank = int(state_parsed.get("current_bank", "-1"))
             station = int(state_parsed.get("current_station", "-1"))
-            stations_data = yaml.safe_load(Path(str(STATIONS_FILE)).read_text(encoding="utf-8")) or {}
+            stations_data = load_yaml_cached(STATIONS_FILE) or {}
             banks = stations_data.get("banks", {})
             bank_entry = banks.get(bank, {}) if isinstance(banks, dict) else {}
             station_entry = (bank_entry.get("stations", {}) or {}).get(station, {}) if isinstance(bank_entry, dict) else {}
@@ -1039,11 +1592,27 @@ class CommandHandler(BaseHTTPRequestHandler):
             self.send_json_response(500, {"success": False, "error": str(exc), "error_type": "restart_failed"})
 
     def send_json_response(self, status_code: int, data: dict[str, Any]):
-        self.send_response(status_code)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode("utf-8"))
+        self._write_prebuilt_json(status_code, _dumps(data))
+
+    def _write_prebuilt_json(self, status_code: int, body: bytes):
+        # Status line, headers and body go out in a single write instead of
+        # send_response/send_header/end_headers followed by a second write.
+        self.log_request(status_code)
+        reason = self.responses.get(status_code, ("",))[0]
+        self.wfile.write(
+            b"%s %d %s\r\nServer: %s\r\nDate: %s\r\n%sContent-Length: %d\r\nConnection: %s\r\n\r\n%s"
+            % (
+                self.protocol_version.encode("latin-1"),
+                status_code,
+                reason.encode("latin-1"),
+                self.version_string().encode("latin-1"),
+                self.date_time_string().encode("latin-1"),
+                _JSON_HEADERS,
+                len(body),
+                b"close" if self.close_connection else b"keep-alive",
+                body,
+            )
+        )
 
     def log_message(self, fmt: str, *args: object):
         print(f"[{self.log_date_time_string()}] {fmt % args}")
@@ -1064,7 +1633,10 @@ def main():
     print("Press Ctrl+C to stop")
     print("=" * 60)
 
-    server = HTTPServer((BIND_HOST, BIND_PORT), CommandHandler)
+    # One thread per request so slow mpc/apply subprocesses do not block
+    # static assets or status polling from other clients.
+    server = ThreadingHTTPServer((BIND_HOST, BIND_PORT), CommandHandler)
+    server.daemon_threads = True
     try:
         server.serve_forever()
     except KeyboardInterrupt: